@@ -8,13 +8,22 @@ Security measures:
 - Short expiration times limit exposure window
 """
 
+import base64
+import os
 import secrets
 import hashlib
+import hmac
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
 import logging
 
+from sqlalchemy import and_, delete, or_
+
 from app import db
+from app import rate_limit
 from app.models import User, AuthToken, RateLimit
 
 logger = logging.getLogger(__name__)
@@ -27,71 +36,108 @@ MAGIC_LINK_EXPIRY = timedelta(minutes=15)
 RATE_LIMIT_WINDOW = timedelta(hours=1)
 RATE_LIMIT_MAX_REQUESTS = 3
 
+# Pre-bound constructor skips the module attribute lookup on every call.
+# CPython's hashlib dispatches to OpenSSL, which uses SHA-NI where available.
+_sha256 = hashlib.sha256
+
 
-def generate_token() -> str:
+def generate_token() -> Tuple[str, bytes]:
     """
     Generate a cryptographically secure random token.
 
-    Returns a 43-character URL-safe base64 string (32 bytes of entropy).
+    Returns a 43-character URL-safe base64 string (32 bytes of entropy)
+    for the email link, plus the same characters pre-encoded as ASCII
+    bytes so the caller can hash without an extra str.encode round trip.
+    The hash input stays the base64 string's bytes, matching how
+    validate_token hashes the token as it arrives in the URL.
     """
-    return secrets.token_urlsafe(32)
+    encoded = base64.urlsafe_b64encode(secrets.token_bytes(32)).rstrip(b"=")
+    return encoded.decode("ascii"), encoded
 
 
-def hash_token(token: str) -> str:
+def hash_token(token: str) -> bytes:
     """
     Hash a token using SHA-256 for secure storage.
 
     The hash is stored in the database, not the raw token.
     This means even if the database is compromised, tokens cannot be recovered.
+
+    Returns the raw 32-byte digest - half the storage and index footprint
+    of the hex encoding, and skips the hex step on the hot path.
     """
-    return hashlib.sha256(token.encode()).hexdigest()
+    return _sha256(token.encode()).digest()
 
 
+@lru_cache(maxsize=4096)
 def hash_email_for_rate_limit(email: str) -> str:
     """
     Hash email for rate limiting.
 
     Uses SHA-256 to create a consistent identifier without storing PII.
+    Cached since the same identifier is hashed on every check and record.
     """
-    return hashlib.sha256(email.lower().strip().encode()).hexdigest()
+    return _sha256(email.lower().strip().encode()).digest().hex()
 
 
-def check_rate_limit(email: str, action_type: str) -> bool:
-    """
-    Check if action is rate limited for this email.
+# Below this size the thread-pool startup cost outweighs the parallelism
+_BULK_HASH_THRESHOLD = 1024
 
-    Args:
-        email: User's email address
-        action_type: Type of action ('password_reset' or 'magic_link')
+# Chunk size for pool.map - small enough that batches just over the
+# inline threshold still spread across all workers
+_BULK_HASH_CHUNKSIZE = 64
 
-    Returns:
-        True if request is allowed, False if rate limited
+
+def hash_emails_bulk(emails: Iterable[str]) -> List[str]:
     """
-    identifier = hash_email_for_rate_limit(email)
-    cutoff = datetime.now(timezone.utc) - RATE_LIMIT_WINDOW
+    Hash many emails at once, for bulk jobs such as the email_hash
+    backfill or an account import.
+
+    OpenSSL's SHA-256 releases the GIL, so a thread pool scales nearly
+    linearly with cores. Small batches are hashed inline, and the
+    per-identifier LRU cache is bypassed since bulk inputs are mostly
+    unique.
+    """
+
+    def _hash(email):
+        return _sha256(email.lower().strip().encode()).digest().hex()
 
-    # Count recent requests
-    count = RateLimit.query.filter(
-        RateLimit.identifier == identifier,
-        RateLimit.action_type == action_type,
-        RateLimit.timestamp > cutoff,
-    ).count()
+    emails = list(emails)
+    if len(emails) < _BULK_HASH_THRESHOLD:
+        return [_hash(email) for email in emails]
 
-    return count < RATE_LIMIT_MAX_REQUESTS
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+        return list(pool.map(_hash, emails, chunksize=_BULK_HASH_CHUNKSIZE))
 
 
-def record_rate_limit(email: str, action_type: str):
+def check_and_record_rate_limit(email: str, action_type: str) -> bool:
     """
-    Record a rate-limited action.
+    Check the rate limit for this email and record the attempt if allowed.
+
+    The sliding window lives in process memory (see app.rate_limit), so
+    the hot path no longer issues a COUNT(*) per request. The RateLimit
+    table is kept as an audit trail and only written for allowed attempts.
 
     Args:
         email: User's email address
         action_type: Type of action ('password_reset' or 'magic_link')
+
+    Returns:
+        True if request is allowed, False if rate limited
     """
     identifier = hash_email_for_rate_limit(email)
-    rate_limit = RateLimit(identifier=identifier, action_type=action_type)
-    db.session.add(rate_limit)
-    db.session.commit()
+
+    allowed = rate_limit.check_and_record(
+        identifier,
+        action_type,
+        max_requests=RATE_LIMIT_MAX_REQUESTS,
+        window=RATE_LIMIT_WINDOW.total_seconds(),
+    )
+
+    if allowed:
+        db.session.add(RateLimit(identifier=identifier, action_type=action_type))
+        db.session.commit()
+
+    return allowed
 
 
 def create_auth_token(user: User, token_type: str) -> str:
@@ -108,17 +154,18 @@ def create_auth_token(user: User, token_type: str) -> str:
         The raw token (for sending in email). This is the only time
         the raw token is available - it's not stored in the database.
     """
-    # Invalidate any existing unused tokens of this type for this user
+    # Invalidate any existing unused tokens of this type for this user.
+    # No commit here - the delete and the insert below flush together in
+    # one transaction, halving fsync cost per token creation on SQLite.
     AuthToken.query.filter(
         AuthToken.user_id == user.uuid,
         AuthToken.token_type == token_type,
         AuthToken.used_at.is_(None),
-    ).delete()
-    db.session.commit()
+    ).delete(synchronize_session=False)
 
-    # Generate new token
-    raw_token = generate_token()
-    token_hash = hash_token(raw_token)
+    # Generate new token, hashing the pre-encoded bytes directly
+    raw_token, raw_bytes = generate_token()
+    token_hash = _sha256(raw_bytes).digest()
 
     # Set expiry based on token type
     if token_type == "password_reset":
@@ -129,8 +176,10 @@ def create_auth_token(user: User, token_type: str) -> str:
     auth_token = AuthToken(
         user_id=user.uuid,
         token_hash=token_hash,
+        token_hash_prefix=token_hash.hex()[:16],
         token_type=token_type,
         expires_at=expiry,
+        expires_at_epoch=int(expiry.timestamp()),
     )
     db.session.add(auth_token)
     db.session.commit()
@@ -143,8 +192,10 @@ def validate_token(raw_token: str, token_type: str) -> Optional[User]:
     """
     Validate a token and return the associated user if valid.
 
-    Uses hash comparison which provides constant-time behavior through
-    the database query (preventing timing attacks).
+    The candidate row is found via an indexed lookup on a 16-char prefix
+    of the hash (smaller index keys than the full 64-char hash); the full
+    hash is then verified with hmac.compare_digest, which guarantees a
+    constant-time comparison regardless of DB string-compare behavior.
 
     Args:
         raw_token: The raw token from the URL
@@ -156,13 +207,15 @@ def validate_token(raw_token: str, token_type: str) -> Optional[User]:
     token_hash = hash_token(raw_token)
 
     auth_token = AuthToken.query.filter(
-        AuthToken.token_hash == token_hash,
+        AuthToken.token_hash_prefix == token_hash.hex()[:16],
         AuthToken.token_type == token_type,
         AuthToken.used_at.is_(None),
-        AuthToken.expires_at > datetime.now(timezone.utc),
+        # Integer epoch compare - no tz-aware datetime allocation or
+        # driver-side datetime formatting per lookup
+        AuthToken.expires_at_epoch > int(time.time()),
     ).first()
 
-    if not auth_token:
+    if not auth_token or not hmac.compare_digest(auth_token.token_hash, token_hash):
         logger.warning(f"Invalid or expired {token_type} token attempted")
         return None
 
@@ -181,9 +234,11 @@ def invalidate_token(raw_token: str) -> bool:
     """
     token_hash = hash_token(raw_token)
 
-    auth_token = AuthToken.query.filter(AuthToken.token_hash == token_hash).first()
+    auth_token = AuthToken.query.filter(
+        AuthToken.token_hash_prefix == token_hash.hex()[:16]
+    ).first()
 
-    if auth_token:
+    if auth_token and hmac.compare_digest(auth_token.token_hash, token_hash):
         auth_token.used_at = datetime.now(timezone.utc)
         db.session.add(auth_token)
         db.session.commit()
@@ -200,25 +255,31 @@ def cleanup_expired_tokens():
     Can be called periodically (e.g., daily) to keep the database clean.
     """
     cutoff = datetime.now(timezone.utc)
-
-    # Delete expired tokens
-    expired_count = AuthToken.query.filter(AuthToken.expires_at < cutoff).delete()
-
-    # Delete old used tokens (keep for a day for audit)
-    used_cutoff = cutoff - timedelta(days=1)
-    used_count = AuthToken.query.filter(
-        AuthToken.used_at.isnot(None), AuthToken.used_at < used_cutoff
-    ).delete()
-
-    # Clean up old rate limit records
+    used_cutoff = cutoff - timedelta(days=1)  # keep used tokens a day for audit
     rate_cutoff = cutoff - RATE_LIMIT_WINDOW
-    rate_count = RateLimit.query.filter(RateLimit.timestamp < rate_cutoff).delete()
 
+    # One bulk DELETE per table; synchronize_session=False skips the
+    # identity-map walk since no loaded instances are touched afterwards
+    token_result = db.session.execute(
+        delete(AuthToken)
+        .where(
+            or_(
+                AuthToken.expires_at_epoch < int(cutoff.timestamp()),
+                and_(AuthToken.used_at.isnot(None), AuthToken.used_at < used_cutoff),
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+    rate_result = db.session.execute(
+        delete(RateLimit)
+        .where(RateLimit.timestamp < rate_cutoff)
+        .execution_options(synchronize_session=False)
+    )
     db.session.commit()
 
     logger.info(
-        f"Cleanup: removed {expired_count} expired tokens, "
-        f"{used_count} used tokens, {rate_count} rate limit records"
+        f"Cleanup: removed {token_result.rowcount} expired/used tokens, "
+        f"{rate_result.rowcount} rate limit records"
     )
 
 
@@ -237,13 +298,7 @@ def get_user_by_email(email: str) -> Optional[User]:
     if not email:
         return None
 
-    email_normalized = email.lower().strip()
-
-    # We need to check all users since email is encrypted
-    # This is not ideal for large user bases, but acceptable for self-hosted
-    users = User.query.all()
-    for user in users:
-        if user.email and user.email.lower() == email_normalized:
-            return user
-
-    return None
+    # Emails are encrypted at rest, so we look up by a deterministic
+    # SHA-256 hash (user.email_hash) maintained alongside the ciphertext.
+    # This is a single indexed SELECT instead of decrypting every user.
+    return User.query.filter_by(email_hash=hash_email_for_rate_limit(email)).first()
@@ -3,15 +3,159 @@ Async email service for DailyNotes.
 Uses SMTP with aiosmtplib for async email sending.
 """
 
+import asyncio
+import re
 import aiosmtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email.utils import formatdate
+from string import Template
 import logging
 from typing import Optional
 
+# Seconds between keepalive NOOPs on the persistent SMTP connections
+SMTP_KEEPALIVE_INTERVAL = 60
+
+# Maximum concurrent SMTP connections. Kept modest - many providers cap
+# concurrent sessions per account at single digits.
+SMTP_POOL_SIZE = 4
+
 logger = logging.getLogger(__name__)
 
 
+# Email bodies are compiled once at import time. string.Template is used
+# instead of per-call f-strings so each send is a single substitution and
+# literal braces in URLs or styles need no escaping.
+
+
+def _minify_html(source: str) -> str:
+    """
+    Strip insignificant whitespace from an HTML template at import time.
+
+    Collapses runs of whitespace and reduces inter-tag whitespace to a
+    single newline, shedding the indentation bytes while keeping each
+    output line bounded by the longest single element - the bodies go
+    out 7bit with no wrapping, so lines must stay under the 998-octet
+    SMTP limit (RFC 5321). Inline styles and rendering are unaffected.
+    """
+    return re.sub(r">\s+<", ">\n<", re.sub(r"\s+", " ", source)).strip()
+
+
+_PASSWORD_RESET_SUBJECT = "Reset Your DailyNotes Password"
+
+_PASSWORD_RESET_HTML = Template(_minify_html("""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+</head>
+<body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif; margin: 0; padding: 20px; background-color: #f5f5f5;">
+    <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; border-radius: 8px; padding: 40px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+        <h1 style="color: #333; margin-top: 0; margin-bottom: 24px;">Reset Your Password</h1>
+        <p style="color: #555; line-height: 1.6; margin-bottom: 24px;">
+            You requested to reset your DailyNotes password. Click the button below to set a new password:
+        </p>
+        <p style="margin: 32px 0; text-align: center;">
+            <a href="$reset_url" style="background-color: #48c774; color: #ffffff; padding: 14px 32px; text-decoration: none; border-radius: 6px; display: inline-block; font-weight: 600; font-size: 16px;">
+                Reset Password
+            </a>
+        </p>
+        <p style="color: #888; font-size: 14px; line-height: 1.5; margin-bottom: 8px;">
+            This link will expire in <strong>1 hour</strong>.
+        </p>
+        <p style="color: #888; font-size: 14px; line-height: 1.5;">
+            If you didn't request this, you can safely ignore this email. Your password will remain unchanged.
+        </p>
+        <hr style="border: none; border-top: 1px solid #eee; margin: 32px 0;">
+        <p style="color: #aaa; font-size: 12px; line-height: 1.5; margin-bottom: 0;">
+            If the button doesn't work, copy and paste this URL into your browser:<br>
+            <a href="$reset_url" style="color: #48c774; word-break: break-all;">$reset_url</a>
+        </p>
+    </div>
+</body>
+</html>
+"""))
+
+_PASSWORD_RESET_TEXT = Template("""Reset Your Password
+
+You requested to reset your DailyNotes password.
+Visit this link to set a new password: $reset_url
+
+This link will expire in 1 hour.
+
+If you didn't request this, you can safely ignore this email.
+Your password will remain unchanged.
+""")
+
+_MAGIC_LINK_SUBJECT = "Sign in to DailyNotes"
+
+_MAGIC_LINK_HTML = Template(_minify_html("""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+</head>
+<body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif; margin: 0; padding: 20px; background-color: #f5f5f5;">
+    <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; border-radius: 8px; padding: 40px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+        <h1 style="color: #333; margin-top: 0; margin-bottom: 24px;">Sign in to DailyNotes</h1>
+        <p style="color: #555; line-height: 1.6; margin-bottom: 24px;">
+            Click the button below to sign in to your account:
+        </p>
+        <p style="margin: 32px 0; text-align: center;">
+            <a href="$login_url" style="background-color: #3273dc; color: #ffffff; padding: 14px 32px; text-decoration: none; border-radius: 6px; display: inline-block; font-weight: 600; font-size: 16px;">
+                Sign In
+            </a>
+        </p>
+        <p style="color: #888; font-size: 14px; line-height: 1.5; margin-bottom: 8px;">
+            This link will expire in <strong>15 minutes</strong>.
+        </p>
+        <p style="color: #888; font-size: 14px; line-height: 1.5;">
+            If you didn't request this, you can safely ignore this email.
+        </p>
+        <hr style="border: none; border-top: 1px solid #eee; margin: 32px 0;">
+        <p style="color: #aaa; font-size: 12px; line-height: 1.5; margin-bottom: 0;">
+            If the button doesn't work, copy and paste this URL into your browser:<br>
+            <a href="$login_url" style="color: #3273dc; word-break: break-all;">$login_url</a>
+        </p>
+    </div>
+</body>
+</html>
+"""))
+
+# Placeholders spliced into the pre-serialized MIME prototypes per send.
+# They stay literal in the serialized bytes because the templates are
+# pure ASCII, so MIMEText emits them 7bit without transfer encoding.
+_LINK_URL_PLACEHOLDER = b"__LINK_URL__"
+_TO_ADDR_PLACEHOLDER = b"__TO_ADDR__"
+_DATE_PLACEHOLDER = b"__DATE__"
+
+# Control characters (including CR/LF) in a recipient would let it inject
+# extra headers when spliced into the serialized prototype
+_CONTROL_CHARS = re.compile(r"[\x00-\x1f\x7f]")
+
+
+def _is_safe_recipient(to_email: str) -> bool:
+    """
+    Check that an address can be spliced into pre-serialized header
+    bytes: pure ASCII with no control characters. Anything else takes
+    the full MIME construction path, where the email library's header
+    validation rejects malformed addresses.
+    """
+    return to_email.isascii() and not _CONTROL_CHARS.search(to_email)
+
+
+_MAGIC_LINK_TEXT = Template("""Sign in to DailyNotes
+
+Click this link to sign in to your account: $login_url
+
+This link will expire in 15 minutes.
+
+If you didn't request this, you can safely ignore this email.
+""")
+
+
 class EmailService:
     """
     Service for sending emails asynchronously via SMTP.
@@ -30,6 +174,19 @@ class EmailService:
         self.app_url = "http://localhost:8000"
         self.enabled = False
 
+        # Pool of persistent SMTP connections, reused across sends to
+        # avoid a full TCP+TLS handshake and login per email. Each slot
+        # holds either a connected client or None (connect lazily).
+        self._pool: asyncio.Queue = asyncio.Queue()
+        for _ in range(SMTP_POOL_SIZE):
+            self._pool.put_nowait(None)
+        self._keepalive_task: Optional[asyncio.Task] = None
+
+        # Pre-serialized MIME prototypes (built in init_app when SMTP is
+        # configured); per send only placeholder bytes are replaced
+        self._reset_msg_bytes: Optional[bytes] = None
+        self._magic_msg_bytes: Optional[bytes] = None
+
         if app:
             self.init_app(app)
 
@@ -46,6 +203,19 @@ class EmailService:
         self.enabled = bool(self.smtp_host and self.smtp_user and self.smtp_password)
 
         if self.enabled:
+            # Assemble each message once with placeholders and keep the
+            # serialized bytes; sends then skip MIME construction entirely
+            placeholder_url = _LINK_URL_PLACEHOLDER.decode("ascii")
+            self._reset_msg_bytes = self._build_template_bytes(
+                _PASSWORD_RESET_SUBJECT,
+                _PASSWORD_RESET_HTML.substitute(reset_url=placeholder_url),
+                _PASSWORD_RESET_TEXT.substitute(reset_url=placeholder_url),
+            )
+            self._magic_msg_bytes = self._build_template_bytes(
+                _MAGIC_LINK_SUBJECT,
+                _MAGIC_LINK_HTML.substitute(login_url=placeholder_url),
+                _MAGIC_LINK_TEXT.substitute(login_url=placeholder_url),
+            )
             logger.info(
                 f"Email service configured: host={self.smtp_host}, port={self.smtp_port}, "
                 f"user={self.smtp_user}, from={self.from_email}, tls={self.smtp_use_tls}"
@@ -61,6 +231,86 @@ class EmailService:
         """Check if email service is properly configured."""
         return self.enabled
 
+    def _build_template_bytes(
+        self, subject: str, html_body: str, text_body: str
+    ) -> bytes:
+        """Assemble a MIME message once and return its serialized bytes."""
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = subject
+        msg["From"] = f"{self.from_name} <{self.from_email}>"
+        msg["To"] = _TO_ADDR_PLACEHOLDER.decode("ascii")
+        msg["Date"] = _DATE_PLACEHOLDER.decode("ascii")
+        msg.attach(MIMEText(text_body, "plain"))
+        msg.attach(MIMEText(html_body, "html"))
+        return msg.as_bytes()
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        """Establish and authenticate a new SMTP connection."""
+        client = aiosmtplib.SMTP(
+            hostname=self.smtp_host,
+            port=self.smtp_port,
+            start_tls=self.smtp_use_tls,
+        )
+        await client.connect()
+        await client.login(self.smtp_user, self.smtp_password)
+
+        if self._keepalive_task is None or self._keepalive_task.done():
+            self._keepalive_task = asyncio.create_task(self._keepalive())
+
+        return client
+
+    async def _acquire_client(self) -> aiosmtplib.SMTP:
+        """
+        Take a pool slot and return a connected, authenticated client.
+
+        Blocks while all slots are in use. Every acquired slot must be
+        returned with _release_client or _discard_client.
+        """
+        client = await self._pool.get()
+        if client is not None and client.is_connected:
+            return client
+        try:
+            return await self._connect()
+        except Exception:
+            self._pool.put_nowait(None)
+            raise
+
+    def _release_client(self, client: aiosmtplib.SMTP):
+        """Return a healthy connection to the pool."""
+        self._pool.put_nowait(client)
+
+    async def _discard_client(self, client: Optional[aiosmtplib.SMTP]):
+        """Drop a broken connection, freeing its slot for a reconnect."""
+        self._pool.put_nowait(None)
+        if client is not None:
+            try:
+                await client.quit()
+            except Exception:
+                pass
+
+    async def _keepalive(self):
+        """Send periodic NOOPs to keep idle pooled connections warm."""
+        while True:
+            await asyncio.sleep(SMTP_KEEPALIVE_INTERVAL)
+
+            idle = []
+            while True:
+                try:
+                    idle.append(self._pool.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            for client in idle:
+                if client is None or not client.is_connected:
+                    self._pool.put_nowait(None)
+                    continue
+                try:
+                    await client.noop()
+                    self._pool.put_nowait(client)
+                except Exception as e:
+                    logger.debug(f"SMTP keepalive failed, dropping connection: {e}")
+                    await self._discard_client(client)
+
     async def send_email(
         self,
         to_email: str,
@@ -94,22 +344,97 @@ class EmailService:
         msg.attach(MIMEText(html_body, "html"))
 
         logger.info(f"Sending email to {to_email}: {subject}")
+        return await self._send_with_retry(
+            lambda client: client.send_message(msg), to_email
+        )
+
+    async def _send_with_retry(self, send, to_email: str) -> bool:
+        """
+        Run a send callable against a pooled client, reconnecting once if
+        the connection went stale between keepalives.
+
+        Args:
+            send: Callable taking an SMTP client and returning the send
+                  awaitable (send_message or sendmail)
+            to_email: Recipient, for logging
 
+        Returns:
+            True if the send succeeded
+        """
         try:
-            await aiosmtplib.send(
-                msg,
-                hostname=self.smtp_host,
-                port=self.smtp_port,
-                username=self.smtp_user,
-                password=self.smtp_password,
-                start_tls=self.smtp_use_tls,
-            )
-            logger.info(f"Email sent successfully to {to_email}")
-            return True
+            client = await self._acquire_client()
+        except Exception as e:
+            logger.error(f"Failed to connect to SMTP server: {e}")
+            return False
+
+        try:
+            await send(client)
+        except aiosmtplib.errors.SMTPException as e:
+            logger.debug(f"SMTP send failed ({e}), reconnecting")
+            await self._discard_client(client)
+            try:
+                client = await self._acquire_client()
+            except Exception as e:
+                # _acquire_client already returned the pool slot
+                logger.error(f"Failed to send email to {to_email}: {e}")
+                return False
+            try:
+                await send(client)
+            except Exception as e:
+                logger.error(f"Failed to send email to {to_email}: {e}")
+                await self._discard_client(client)
+                return False
         except Exception as e:
             logger.error(f"Failed to send email to {to_email}: {e}")
+            await self._discard_client(client)
             return False
 
+        self._release_client(client)
+        logger.info(f"Email sent successfully to {to_email}")
+        return True
+
+    async def _send_prebuilt(
+        self, template_bytes: bytes, to_email: str, link_url: str, subject: str
+    ) -> bool:
+        """
+        Send a pre-serialized MIME template, splicing in the recipient,
+        link URL, and date with bytes.replace - no per-send MIME object
+        graph construction.
+        """
+        payload = (
+            template_bytes.replace(_LINK_URL_PLACEHOLDER, link_url.encode("ascii"))
+            .replace(_TO_ADDR_PLACEHOLDER, to_email.encode("ascii"))
+            .replace(_DATE_PLACEHOLDER, formatdate(localtime=True).encode("ascii"))
+        )
+
+        logger.info(f"Sending email to {to_email}: {subject}")
+        return await self._send_with_retry(
+            lambda client: client.sendmail(self.from_email, [to_email], payload),
+            to_email,
+        )
+
+    async def send_many(self, jobs):
+        """
+        Send multiple emails concurrently over the connection pool.
+
+        Args:
+            jobs: Iterable of dicts of send_email keyword arguments
+                  (to_email, subject, html_body, optional text_body)
+
+        Returns:
+            List of results in job order; each entry is the send_email
+            bool, or the exception raised for that job.
+        """
+        semaphore = asyncio.Semaphore(SMTP_POOL_SIZE)
+
+        async def send_one(job):
+            async with semaphore:
+                return await self.send_email(**job)
+
+        return await asyncio.gather(
+            *(send_one(job) for job in jobs), return_exceptions=True
+        )
+
     async def send_password_reset(self, to_email: str, token: str) -> bool:
         """
         Send password reset email.
@@ -123,51 +448,18 @@ class EmailService:
         """
         reset_url = f"{self.app_url}/auth/reset-password?token={token}"
 
-        subject = "Reset Your DailyNotes Password"
-        html_body = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-</head>
-<body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif; margin: 0; padding: 20px; background-color: #f5f5f5;">
-    <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; border-radius: 8px; padding: 40px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-        <h1 style="color: #333; margin-top: 0; margin-bottom: 24px;">Reset Your Password</h1>
-        <p style="color: #555; line-height: 1.6; margin-bottom: 24px;">
-            You requested to reset your DailyNotes password. Click the button below to set a new password:
-        </p>
-        <p style="margin: 32px 0; text-align: center;">
-            <a href="{reset_url}" style="background-color: #48c774; color: #ffffff; padding: 14px 32px; text-decoration: none; border-radius: 6px; display: inline-block; font-weight: 600; font-size: 16px;">
-                Reset Password
-            </a>
-        </p>
-        <p style="color: #888; font-size: 14px; line-height: 1.5; margin-bottom: 8px;">
-            This link will expire in <strong>1 hour</strong>.
-        </p>
-        <p style="color: #888; font-size: 14px; line-height: 1.5;">
-            If you didn't request this, you can safely ignore this email. Your password will remain unchanged.
-        </p>
-        <hr style="border: none; border-top: 1px solid #eee; margin: 32px 0;">
-        <p style="color: #aaa; font-size: 12px; line-height: 1.5; margin-bottom: 0;">
-            If the button doesn't work, copy and paste this URL into your browser:<br>
-            <a href="{reset_url}" style="color: #48c774; word-break: break-all;">{reset_url}</a>
-        </p>
-    </div>
-</body>
-</html>
-"""
-        text_body = f"""Reset Your Password
-
-You requested to reset your DailyNotes password.
-Visit this link to set a new password: {reset_url}
-
-This link will expire in 1 hour.
+        if self._reset_msg_bytes is not None and _is_safe_recipient(to_email):
+            return await self._send_prebuilt(
+                self._reset_msg_bytes, to_email, reset_url, _PASSWORD_RESET_SUBJECT
+            )
 
-If you didn't request this, you can safely ignore this email.
-Your password will remain unchanged.
-"""
-        return await self.send_email(to_email, subject, html_body, text_body)
+        # Unsafe recipient (or unconfigured service): full construction
+        return await self.send_email(
+            to_email,
+            _PASSWORD_RESET_SUBJECT,
+            _PASSWORD_RESET_HTML.substitute(reset_url=reset_url),
+            _PASSWORD_RESET_TEXT.substitute(reset_url=reset_url),
+        )
 
     async def send_magic_link(self, to_email: str, token: str) -> bool:
         """
@@ -182,49 +474,18 @@ Your password will remain unchanged.
         """
         login_url = f"{self.app_url}/auth/verify-magic-link?token={token}"
 
-        subject = "Sign in to DailyNotes"
-        html_body = f"""
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-</head>
-<body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif; margin: 0; padding: 20px; background-color: #f5f5f5;">
-    <div style="max-width: 600px; margin: 0 auto; background-color: #ffffff; border-radius: 8px; padding: 40px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-        <h1 style="color: #333; margin-top: 0; margin-bottom: 24px;">Sign in to DailyNotes</h1>
-        <p style="color: #555; line-height: 1.6; margin-bottom: 24px;">
-            Click the button below to sign in to your account:
-        </p>
-        <p style="margin: 32px 0; text-align: center;">
-            <a href="{login_url}" style="background-color: #3273dc; color: #ffffff; padding: 14px 32px; text-decoration: none; border-radius: 6px; display: inline-block; font-weight: 600; font-size: 16px;">
-                Sign In
-            </a>
-        </p>
-        <p style="color: #888; font-size: 14px; line-height: 1.5; margin-bottom: 8px;">
-            This link will expire in <strong>15 minutes</strong>.
-        </p>
-        <p style="color: #888; font-size: 14px; line-height: 1.5;">
-            If you didn't request this, you can safely ignore this email.
-        </p>
-        <hr style="border: none; border-top: 1px solid #eee; margin: 32px 0;">
-        <p style="color: #aaa; font-size: 12px; line-height: 1.5; margin-bottom: 0;">
-            If the button doesn't work, copy and paste this URL into your browser:<br>
-            <a href="{login_url}" style="color: #3273dc; word-break: break-all;">{login_url}</a>
-        </p>
-    </div>
-</body>
-</html>
-"""
-        text_body = f"""Sign in to DailyNotes
-
-Click this link to sign in to your account: {login_url}
-
-This link will expire in 15 minutes.
+        if self._magic_msg_bytes is not None and _is_safe_recipient(to_email):
+            return await self._send_prebuilt(
+                self._magic_msg_bytes, to_email, login_url, _MAGIC_LINK_SUBJECT
+            )
 
-If you didn't request this, you can safely ignore this email.
-"""
-        return await self.send_email(to_email, subject, html_body, text_body)
+        # Unsafe recipient (or unconfigured service): full construction
+        return await self.send_email(
+            to_email,
+            _MAGIC_LINK_SUBJECT,
+            _MAGIC_LINK_HTML.substitute(login_url=login_url),
+            _MAGIC_LINK_TEXT.substitute(login_url=login_url),
+        )
 
 
 # Global email service instance - initialized with app in __init__.py
@@ -5,10 +5,12 @@ from sqlalchemy import (
     String,
     Boolean,
     Integer,
+    BigInteger,
     DateTime,
     LargeBinary,
     ForeignKey,
     Text,
+    Index,
     event,
     text,
 )
@@ -19,6 +21,7 @@ from sqlalchemy.orm.attributes import InstrumentedAttribute
 from Crypto.Cipher import AES
 from Crypto.Random import get_random_bytes
 import binascii
+import hashlib
 import uuid
 import frontmatter
 import re
@@ -223,6 +226,7 @@ class User(Base):
     kanban_columns = Column(String(512), nullable=True, default='["todo", "done"]')
     week_start_monday = Column(Boolean, nullable=True, default=False)
     email_encrypted = Column("email", LargeBinary, nullable=True)
+    email_hash = Column(String(64), unique=True, nullable=True, index=True)
     daily_template = Column(Text, nullable=True)  # Template for daily notes
     note_template = Column(Text, nullable=True)  # Template for regular notes
     notes = relationship("Note", lazy="dynamic", cascade="all, delete, delete-orphan")
@@ -241,9 +245,14 @@ class User(Base):
     @email.setter
     def email(self, value):
         if value:
-            self.email_encrypted = aes_encrypt(value.lower().strip())
+            normalized = value.lower().strip()
+            self.email_encrypted = aes_encrypt(normalized)
+            # Deterministic hash allows indexed lookups without storing PII
+            # (must match hash_email_for_rate_limit in app/auth_tokens.py)
+            self.email_hash = hashlib.sha256(normalized.encode()).hexdigest()
         else:
             self.email_encrypted = None
+            self.email_hash = None
 
     def __repr__(self):
         return "<User {}>".format(self.uuid)
@@ -666,14 +675,32 @@ class AuthToken(Base):
 
     __tablename__ = "auth_token"
 
+    # Composite index covers the full validate_token filter so lookups
+    # are a single index range scan instead of index-seek + row fetch.
+    # Keyed on the 16-char hash prefix rather than the full hash for a
+    # shallower B-tree; the full hash is verified in Python afterwards.
+    __table_args__ = (
+        Index(
+            "ix_auth_token_lookup",
+            "token_hash_prefix",
+            "token_type",
+            "used_at",
+            "expires_at_epoch",
+        ),
+    )
+
     uuid = Column(
         GUID, primary_key=True, index=True, unique=True, default=lambda: uuid.uuid4()
     )
     user_id = Column(GUID, ForeignKey("user.uuid"), nullable=False)
-    token_hash = Column(String(128), nullable=False, index=True)
+    token_hash = Column(LargeBinary(32), nullable=False)  # raw SHA-256 digest
+    token_hash_prefix = Column(String(16), nullable=True)  # first 16 hex chars
     token_type = Column(String(32), nullable=False)  # 'password_reset' or 'magic_link'
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     expires_at = Column(DateTime(timezone=True), nullable=False)
+    # Unix-epoch mirror of expires_at; integer compares on the hot path
+    # avoid allocating tz-aware datetimes per query
+    expires_at_epoch = Column(BigInteger, nullable=True)
     used_at = Column(DateTime(timezone=True), nullable=True)  # NULL if unused
 
     user = relationship("User", back_populates="auth_tokens")
@@ -700,10 +727,15 @@ class RateLimit(Base):
 
     __tablename__ = "rate_limit"
 
+    # Composite index supports audit queries over (identifier, action, window)
+    __table_args__ = (
+        Index("ix_rate_limit_lookup", "identifier", "action_type", "timestamp"),
+    )
+
     uuid = Column(
         GUID, primary_key=True, index=True, unique=True, default=lambda: uuid.uuid4()
     )
-    identifier = Column(String(256), nullable=False, index=True)  # Hashed email
+    identifier = Column(String(256), nullable=False)  # Hashed email
     action_type = Column(String(32), nullable=False)  # 'password_reset' or 'magic_link'
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -0,0 +1,66 @@
+"""
+Process-local sliding-window rate limiter.
+
+Replaces the SQL COUNT(*) + INSERT pair that used to run on every
+password-reset and magic-link request with a single O(1) in-memory
+check. This suits the single-worker deployments DailyNotes targets;
+with multiple workers each process keeps its own window, which only
+makes the limit slightly more permissive.
+"""
+
+import time
+from collections import deque
+from threading import Lock
+
+# (action, identifier) -> deque of monotonic timestamps within the window
+_windows = {}
+_lock = Lock()
+
+# Sweep stale identifiers once the table grows past this many entries
+_PRUNE_THRESHOLD = 10000
+
+
+def _prune(now, window):
+    """Drop identifiers whose every recorded timestamp has expired."""
+    stale = [
+        key
+        for key, timestamps in _windows.items()
+        if not timestamps or now - timestamps[-1] >= window
+    ]
+    for key in stale:
+        del _windows[key]
+
+
+def check_and_record(identifier, action, max_requests=3, window=3600.0):
+    """
+    Atomically check the rate limit and record the attempt if allowed.
+
+    Args:
+        identifier: Opaque identifier (e.g., hashed email)
+        action: Action name (e.g., 'password_reset' or 'magic_link')
+        max_requests: Maximum attempts allowed within the window
+        window: Window length in seconds
+
+    Returns:
+        True if the attempt is allowed (and was recorded), False if
+        the identifier is rate limited.
+    """
+    key = (action, identifier)
+    now = time.monotonic()
+
+    with _lock:
+        timestamps = _windows.get(key)
+        if timestamps is None:
+            if len(_windows) >= _PRUNE_THRESHOLD:
+                _prune(now, window)
+            timestamps = _windows[key] = deque()
+
+        # Expire entries that have slid out of the window
+        while timestamps and now - timestamps[0] >= window:
+            timestamps.popleft()
+
+        if len(timestamps) >= max_requests:
+            return False
+
+        timestamps.append(now)
+        return True
@@ -41,8 +41,7 @@ from app.models import (
     get_task_column,
 )
 from app.auth_tokens import (
-    check_rate_limit,
-    record_rate_limit,
+    check_and_record_rate_limit,
     create_auth_token,
     validate_token,
     invalidate_token,
@@ -925,13 +924,10 @@ async def forgot_password():
             200,
         )
 
-    # Check rate limit
-    if not check_rate_limit(email, "password_reset"):
+    # Check rate limit and record the attempt
+    if not check_and_record_rate_limit(email, "password_reset"):
         return jsonify(error="Too many requests. Please try again later."), 429
 
-    # Record the attempt for rate limiting
-    record_rate_limit(email, "password_reset")
-
     # Find user by email
     user = get_user_by_email(email)
 
@@ -1016,13 +1012,10 @@ async def request_magic_link():
             200,
         )
 
-    # Check rate limit
-    if not check_rate_limit(email, "magic_link"):
+    # Check rate limit and record the attempt
+    if not check_and_record_rate_limit(email, "magic_link"):
         return jsonify(error="Too many requests. Please try again later."), 429
 
-    # Record the attempt for rate limiting
-    record_rate_limit(email, "magic_link")
-
     # Find user by email
     user = get_user_by_email(email)
 
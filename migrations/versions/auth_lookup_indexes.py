@@ -0,0 +1,42 @@
+"""Add composite lookup indexes for auth_token and rate_limit
+
+Revision ID: auth_lookup_idx_001
+Revises: email_hash_001
+Create Date: 2026-08-27 00:00:00.000000
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "auth_lookup_idx_001"
+down_revision = "email_hash_001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Covers the full validate_token filter (token_hash, token_type,
+    # used_at, expires_at) so the query is a pure index range scan
+    op.create_index(
+        "ix_auth_token_lookup",
+        "auth_token",
+        ["token_hash", "token_type", "used_at", "expires_at"],
+    )
+    op.create_index(
+        "ix_rate_limit_lookup",
+        "rate_limit",
+        ["identifier", "action_type", "timestamp"],
+    )
+
+    # Single-column indexes are redundant prefixes of the composite ones
+    op.drop_index("ix_auth_token_token_hash", table_name="auth_token")
+    op.drop_index("ix_rate_limit_identifier", table_name="rate_limit")
+
+
+def downgrade():
+    op.create_index("ix_rate_limit_identifier", "rate_limit", ["identifier"])
+    op.create_index("ix_auth_token_token_hash", "auth_token", ["token_hash"])
+    op.drop_index("ix_rate_limit_lookup", table_name="rate_limit")
+    op.drop_index("ix_auth_token_lookup", table_name="auth_token")
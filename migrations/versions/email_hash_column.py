@@ -0,0 +1,58 @@
+"""Add email_hash column to user for indexed email lookups
+
+Revision ID: email_hash_001
+Revises: note_templates_001
+Create Date: 2026-08-27 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "email_hash_001"
+down_revision = "note_templates_001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("user", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("email_hash", sa.String(length=64), nullable=True)
+        )
+    op.create_index("ix_user_email_hash", "user", ["email_hash"], unique=True)
+
+    # Backfill hashes for users that already have an email on file.
+    # hash_emails_bulk applies the same SHA-256-of-normalized-email as
+    # hash_email_for_rate_limit, so lookups stay consistent, and it
+    # parallelizes hashing for large user tables.
+    from app.auth_tokens import hash_emails_bulk
+    from app.models import aes_decrypt
+
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.text('SELECT uuid, email FROM "user" WHERE email IS NOT NULL')
+    ).fetchall()
+
+    user_ids = []
+    emails = []
+    for row_uuid, encrypted_email in rows:
+        email = aes_decrypt(encrypted_email)
+        if not email or not isinstance(email, str):
+            continue
+        user_ids.append(row_uuid)
+        emails.append(email)
+
+    for row_uuid, email_hash in zip(user_ids, hash_emails_bulk(emails)):
+        bind.execute(
+            sa.text('UPDATE "user" SET email_hash = :email_hash WHERE uuid = :uuid'),
+            {"email_hash": email_hash, "uuid": row_uuid},
+        )
+
+
+def downgrade():
+    op.drop_index("ix_user_email_hash", table_name="user")
+    with op.batch_alter_table("user", schema=None) as batch_op:
+        batch_op.drop_column("email_hash")
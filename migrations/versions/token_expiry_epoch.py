@@ -0,0 +1,69 @@
+"""Add expires_at_epoch to auth_token for integer expiry compares
+
+Revision ID: token_expiry_epoch_001
+Revises: token_hash_binary_001
+Create Date: 2026-08-27 00:00:00.000000
+
+"""
+
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+from dateutil import parser as date_parser
+
+
+# revision identifiers, used by Alembic.
+revision = "token_expiry_epoch_001"
+down_revision = "token_hash_binary_001"
+branch_labels = None
+depends_on = None
+
+
+def _to_epoch(value):
+    """Convert a stored expires_at value (str or datetime) to unix epoch."""
+    if isinstance(value, str):
+        value = date_parser.parse(value)
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def upgrade():
+    with op.batch_alter_table("auth_token", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("expires_at_epoch", sa.BigInteger(), nullable=True)
+        )
+
+    # Backfill epochs so tokens issued before the upgrade stay valid
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT uuid, expires_at FROM auth_token")).fetchall()
+    for row_uuid, expires_at in rows:
+        epoch = _to_epoch(expires_at)
+        if epoch is None:
+            continue
+        bind.execute(
+            sa.text("UPDATE auth_token SET expires_at_epoch = :e WHERE uuid = :uuid"),
+            {"e": epoch, "uuid": row_uuid},
+        )
+
+    # Re-key the lookup index on the epoch column used by validate_token
+    op.drop_index("ix_auth_token_lookup", table_name="auth_token")
+    op.create_index(
+        "ix_auth_token_lookup",
+        "auth_token",
+        ["token_hash_prefix", "token_type", "used_at", "expires_at_epoch"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_auth_token_lookup", table_name="auth_token")
+    op.create_index(
+        "ix_auth_token_lookup",
+        "auth_token",
+        ["token_hash_prefix", "token_type", "used_at", "expires_at"],
+    )
+    with op.batch_alter_table("auth_token", schema=None) as batch_op:
+        batch_op.drop_column("expires_at_epoch")
@@ -0,0 +1,63 @@
+"""Store auth_token.token_hash as raw 32-byte digest
+
+Revision ID: token_hash_binary_001
+Revises: token_hash_prefix_001
+Create Date: 2026-08-27 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "token_hash_binary_001"
+down_revision = "token_hash_prefix_001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Convert existing hex-encoded hashes to raw bytes BEFORE the column
+    # type change: once the column is LargeBinary the driver returns the
+    # old hex text as 64-byte ASCII blobs, so conversion must happen
+    # while values still come back as str. The hex prefix column is
+    # unaffected (digest.hex()[:16] == hexdigest()[:16]).
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT uuid, token_hash FROM auth_token")).fetchall()
+    for row_uuid, token_hash in rows:
+        if isinstance(token_hash, bytes) and len(token_hash) == 64:
+            # Hex text that already round-tripped through a blob cast
+            token_hash = token_hash.decode("ascii")
+        if isinstance(token_hash, str):
+            bind.execute(
+                sa.text("UPDATE auth_token SET token_hash = :h WHERE uuid = :uuid"),
+                {"h": bytes.fromhex(token_hash), "uuid": row_uuid},
+            )
+
+    with op.batch_alter_table("auth_token", schema=None) as batch_op:
+        batch_op.alter_column(
+            "token_hash",
+            existing_type=sa.String(128),
+            type_=sa.LargeBinary(32),
+            existing_nullable=False,
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    rows = bind.execute(sa.text("SELECT uuid, token_hash FROM auth_token")).fetchall()
+    for row_uuid, token_hash in rows:
+        if isinstance(token_hash, bytes) and len(token_hash) == 32:
+            bind.execute(
+                sa.text("UPDATE auth_token SET token_hash = :h WHERE uuid = :uuid"),
+                {"h": token_hash.hex(), "uuid": row_uuid},
+            )
+
+    with op.batch_alter_table("auth_token", schema=None) as batch_op:
+        batch_op.alter_column(
+            "token_hash",
+            existing_type=sa.LargeBinary(32),
+            type_=sa.String(128),
+            existing_nullable=False,
+        )
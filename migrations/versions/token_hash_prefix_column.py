@@ -0,0 +1,49 @@
+"""Add token_hash_prefix to auth_token for prefix-indexed lookups
+
+Revision ID: token_hash_prefix_001
+Revises: auth_lookup_idx_001
+Create Date: 2026-08-27 00:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "token_hash_prefix_001"
+down_revision = "auth_lookup_idx_001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("auth_token", schema=None) as batch_op:
+        batch_op.add_column(
+            sa.Column("token_hash_prefix", sa.String(length=16), nullable=True)
+        )
+
+    # Backfill prefixes for existing tokens
+    op.get_bind().execute(
+        sa.text("UPDATE auth_token SET token_hash_prefix = substr(token_hash, 1, 16)")
+    )
+
+    # Re-key the lookup index on the prefix; the full hash is verified
+    # in Python with hmac.compare_digest after the indexed lookup
+    op.drop_index("ix_auth_token_lookup", table_name="auth_token")
+    op.create_index(
+        "ix_auth_token_lookup",
+        "auth_token",
+        ["token_hash_prefix", "token_type", "used_at", "expires_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_auth_token_lookup", table_name="auth_token")
+    op.create_index(
+        "ix_auth_token_lookup",
+        "auth_token",
+        ["token_hash", "token_type", "used_at", "expires_at"],
+    )
+    with op.batch_alter_table("auth_token", schema=None) as batch_op:
+        batch_op.drop_column("token_hash_prefix")